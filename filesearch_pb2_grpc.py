@@ -35,7 +35,7 @@ class FileSearcherStub(object):
         Args:
             channel: A grpc.Channel.
         """
-        self.SearchFiles = channel.unary_unary(
+        self.SearchFiles = channel.unary_stream(
                 '/filesearch.FileSearcher/SearchFiles',
                 request_serializer=filesearch__pb2.SearchRequest.SerializeToString,
                 response_deserializer=filesearch__pb2.SearchResponse.FromString,
@@ -48,6 +48,7 @@ class FileSearcherServicer(object):
 
     def SearchFiles(self, request, context):
         """The RPC function
+        Results are streamed back in chunks as each search root is walked.
         """
         context.set_code(grpc.StatusCode.UNIMPLEMENTED)
         context.set_details('Method not implemented!')
@@ -56,7 +57,7 @@ class FileSearcherServicer(object):
 
 def add_FileSearcherServicer_to_server(servicer, server):
     rpc_method_handlers = {
-            'SearchFiles': grpc.unary_unary_rpc_method_handler(
+            'SearchFiles': grpc.unary_stream_rpc_method_handler(
                     servicer.SearchFiles,
                     request_deserializer=filesearch__pb2.SearchRequest.FromString,
                     response_serializer=filesearch__pb2.SearchResponse.SerializeToString,
@@ -84,7 +85,7 @@ class FileSearcher(object):
             wait_for_ready=None,
             timeout=None,
             metadata=None):
-        return grpc.experimental.unary_unary(
+        return grpc.experimental.unary_stream(
             request,
             target,
             '/filesearch.FileSearcher/SearchFiles',
@@ -1,35 +1,95 @@
+import os
+# Use the native (upb) protobuf backend rather than the pure-Python one. This must be set
+# before google.protobuf is first imported.
+os.environ.setdefault("PROTOCOL_BUFFERS_PYTHON_IMPLEMENTATION", "upb")
+import atexit
+import functools
 import grpc
+import itertools
+import logging
+import mmap
 import sys  # Import sys for flushing output
-import json
+import threading
+import time
 import re
-import os
-from typing import Optional, Literal, Dict, Any
-from pydantic import BaseModel, Field
-from langchain_ollama import OllamaLLM
+import shutil
+from collections import OrderedDict
+from typing import Optional, Literal, Dict, Tuple
+from pydantic import BaseModel, Field, ValidationError
 import filesearch_pb2
 import filesearch_pb2_grpc
+from google.protobuf.internal import api_implementation
+if api_implementation.Type() == "python":
+    print("WARNING: pure-Python protobuf backend in use; install protobuf>=4.21 for the native upb backend.")
+
+# Set MCP_CLIENT_DEBUG=1 to also print per-call trace lines (gRPC requests, cache hits, routing).
+logger = logging.getLogger(__name__)
 
 # --- 0. System policy for tool routing ---
 SYSTEM_POLICY = (
-    "You are an assistant for MCP-File-Manager. Follow this tool-use policy strictly.\n"
-    "When to call the tool:\n"
-    "- Call remote_file_search when the user asks to find files or folders by name, glob/pattern, size, or modified time within allowed locations.\n"
-    "When NOT to call the tool:\n"
-    "- Do not call tools for purely conceptual questions (e.g., 'what is a glob?'); answer directly.\n"
-    "- Do not call tools if required arguments are missing; first ask a concise clarifying question.\n"
-    "Pre-call checklist (enforce before calling):\n"
-    "- file_pattern is present and looks like a pattern or filename (e.g., '*.py', 'report.*', 'notes.txt').\n"
-    "- If base_path_key is provided, it must be one of: docs, downloads, desktop, pictures, videos, music.\n"
-    "Output rules after any tool call:\n"
-    "- Summarize results succinctly. If many items are returned, show only the top results and note the total.\n"
-    "- For empty results, say 'No files found for that criteria.'\n"
-    "Examples (for routing intuition):\n"
-    "- User: 'Explain glob patterns' -> No tool call; provide explanation.\n"
-    "- User: 'Find all *.py in docs' -> Call remote_file_search with file_pattern='*.py', base_path_key='docs'.\n"
-    "- User: 'Search for report.*' (no location) -> Ask: 'Which base location? (docs/downloads/desktop/pictures/videos/music) or search all?'\n"
-    "- User: 'show README.md from docs' -> Use show action with file_name='README.md', base_path_key='docs'.\n"
+    "You are an assistant for MCP-File-Manager. Follow this routing policy strictly.\n"
+    "- search: the user asks to find files or folders by name or glob/pattern within allowed locations.\n"
+    "- answer: purely conceptual questions (e.g., 'what is a glob?'); do not search.\n"
+    "- clarify: a search is likely but required arguments are missing; ask one concise question.\n"
+    "- file_pattern must look like a pattern or filename (e.g., '*.py', 'report.*', 'notes.txt').\n"
+    "Examples:\n"
+    "- 'Explain glob patterns' -> answer.\n"
+    "- 'Find all *.py in docs' -> search with file_pattern='*.py', base_path_key='docs'.\n"
+    "- 'Search for report.*' (no location) -> clarify: 'Which base location? (docs/downloads/desktop/pictures/videos/music) or search all?'\n"
+    "- 'show README.md from docs' -> show with file_name='README.md', base_path_key='docs'.\n"
+)
+
+# Planner instructions are sent as one constant system message so the per-turn prompt is
+# just the user's query and Ollama can reuse the cached system-prompt prefix across turns.
+PLANNER_SYSTEM_PROMPT = SYSTEM_POLICY + (
+    "Decide one action and fill only its matching field:\n"
+    '- "search": find files/folders.\n'
+    '- "show": the user gave the exact name of a single file (no wildcards, no paths); its full content will be displayed.\n'
+    '- "answer": a conceptual/explanatory question; leave "answer" empty, the reply is written separately.\n'
+    '- "clarify": ask exactly one short clarifying question in "clarify".\n'
+)
+ANSWER_SYSTEM_PROMPT = "You are an assistant for MCP-File-Manager. Answer the user's question concisely."
+
+# Template queries like "find *.py in docs" or "search for report.*" are routed without the LLM.
+# The pattern must contain a '.' or a wildcard so plain words ("list files") still go to the planner.
+_FAST_SEARCH_RE = re.compile(
+    r"(?:find|search|list)\s+(?:for\s+)?(?:all\s+)?"
+    r"(?P<pat>(?=[\w.*?\[\]]*[.*?\[])[\w.*?\[\]]+)"
+    r"(?:\s+(?:in|from)\s+(?P<key>docs|downloads|desktop|pictures|videos|music))?",
+    re.IGNORECASE,
 )
 
+# Filename extraction for the 'show' action.
+_QUOTED_RE = re.compile(r'["\']([^"\']{1,255})["\']')
+# Path separators and wildcards: a 'show' target must contain none of these. Brackets are
+# allowed (Windows permits them in names) because 'show' searches with exact_basename.
+_BAD_FILENAME_CHARS = frozenset('\\/:*?')
+
+def _is_simple_filename(name: str) -> bool:
+    """True for a bare filename: no path separators and no wildcards."""
+    return bool(name) and _BAD_FILENAME_CHARS.isdisjoint(name)
+
+# --- 0b. LLM response caching ---
+# Parsed plans keyed by the normalized user query; the planner's system prompt is constant,
+# so a repeated query can skip the Ollama round-trip entirely.
+PLAN_CACHE_MAXSIZE = 256
+_plan_cache: "OrderedDict[str, Plan]" = OrderedDict()
+
+def _normalize_query(query: str) -> str:
+    return " ".join(query.split()).lower()
+
+def _plan_cache_get(key: str) -> Optional["Plan"]:
+    plan = _plan_cache.get(key)
+    if plan is not None:
+        _plan_cache.move_to_end(key)
+    return plan
+
+def _plan_cache_put(key: str, plan: "Plan") -> None:
+    _plan_cache[key] = plan
+    _plan_cache.move_to_end(key)
+    while len(_plan_cache) > PLAN_CACHE_MAXSIZE:
+        _plan_cache.popitem(last=False)
+
 # --- 1. Define the LLM Tool (updated descriptions/schemas) ---
 class FileSearchTool(BaseModel):
     """Search for files/folders on the remote server via gRPC.
@@ -56,54 +116,220 @@ class FileSearchTool(BaseModel):
         False, description="Include hidden files and folders (those starting with '.')."
     )
 
+class FileShowArgs(BaseModel):
+    """Display the full content of a single file found by its exact name."""
+
+    file_name: str = Field(
+        ..., description="Exact filename only (e.g., 'README.md'); no wildcards or paths."
+    )
+    base_path_key: Optional[Literal["docs", "downloads", "desktop", "pictures", "videos", "music"]] = Field(
+        None,
+        description=(
+            "Restrict the lookup to a specific known folder key. If omitted, searches all allowed paths."
+        ),
+    )
+    include_hidden: bool = Field(
+        False, description="Include hidden files and folders (those starting with '.')."
+    )
+
+class Plan(BaseModel):
+    """The planner's decision for one user query; only the field matching `action` is filled."""
+
+    action: Literal["search", "show", "answer", "clarify"]
+    search: Optional[FileSearchTool] = None
+    show: Optional[FileShowArgs] = None
+    answer: Optional[str] = None
+    clarify: Optional[str] = None
+
 # Retained for schema documentation purposes; we no longer bind LangChain tools directly.
 def remote_file_search(file_pattern: str, base_path_key: Optional[str] = None, include_hidden: bool = False):
     """Search for files/folders. This is invoked by the client after routing, not by LangChain tool-calling."""
     pass
 
 # --- 2. The gRPC Client Function (Debug Enabled) ---
-def call_grpc_server(file_pattern: str, base_key: Optional[str], hidden: bool, *, verbose: bool = True):
+GRPC_TARGET = 'localhost:50051'
+
+GRPC_CHANNEL_OPTIONS = [
+    ('grpc.keepalive_time_ms', 30000),
+    ('grpc.keepalive_timeout_ms', 10000),
+    ('grpc.keepalive_permit_without_calls', 1),
+    ('grpc.http2.max_pings_without_data', 0),
+    # Larger HTTP/2 flow-control window and message cap for big result chunks.
+    ('grpc.http2.lookahead_bytes', 1 << 20),
+    ('grpc.max_receive_message_length', 64 << 20),
+]
+GRPC_POOL_SIZE = 4
+# Deadline for a whole SearchFiles stream, so a stalled server cannot hang the REPL. It
+# bounds the full streamed result, so it leaves room for large global searches.
+GRPC_TIMEOUT_S = 30.0
+# File lists share long path prefixes and compress very well.
+GRPC_COMPRESSION = grpc.Compression.Gzip
+
+class ChannelPool:
+    """A fixed set of long-lived channels handed out round-robin.
+
+    Each channel is its own TCP connection, so concurrent searches do not share
+    one HTTP/2 send buffer and congestion window.
+    """
+
+    def __init__(self, target: str, n: int = GRPC_POOL_SIZE, options=None, compression=None):
+        # Channels with identical args share gRPC's global subchannel pool, i.e. a single
+        # connection; a local pool per channel gives each one its own.
+        options = list(options or []) + [('grpc.use_local_subchannel_pool', 1)]
+        self.channels = [
+            grpc.insecure_channel(target, options=options, compression=compression) for _ in range(n)
+        ]
+        self.stubs = [filesearch_pb2_grpc.FileSearcherStub(c) for c in self.channels]
+        self._i = itertools.count()
+
+    def connect(self):
+        """Start connecting every channel in the background without blocking the caller.
+
+        gRPC connects lazily on the first RPC; kicking it off early lets the TCP/HTTP2
+        handshakes overlap with the LLM call that produces the search plan.
+        """
+        return [grpc.channel_ready_future(c) for c in self.channels]
+
+    def next_stub(self):
+        return self.stubs[next(self._i) % len(self.stubs)]
+
+    def close(self):
+        for channel in self.channels:
+            channel.close()
+
+# Created on first use and then reused for the whole process.
+_pool: Optional[ChannelPool] = None
+_pool_lock = threading.Lock()
+
+def get_channel_pool() -> ChannelPool:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ChannelPool(GRPC_TARGET, options=GRPC_CHANNEL_OPTIONS, compression=GRPC_COMPRESSION)
+                atexit.register(_pool.close)
+    return _pool
+
+# Recent search results keyed by (file_pattern, base_key, include_hidden, exact). Entries
+# expire after a short TTL so files created or deleted on the server still show up.
+SEARCH_CACHE_TTL_S = 30.0
+SEARCH_CACHE_MAXSIZE = 256
+SearchCacheKey = Tuple[str, Optional[str], bool, bool]
+_search_cache: "OrderedDict[SearchCacheKey, Tuple[float, Tuple[str, ...]]]" = OrderedDict()
+
+def _search_cache_get(key: SearchCacheKey) -> Optional[Tuple[str, ...]]:
+    entry = _search_cache.get(key)
+    if entry is None:
+        return None
+    stored_at, paths = entry
+    if time.monotonic() - stored_at > SEARCH_CACHE_TTL_S:
+        del _search_cache[key]
+        return None
+    _search_cache.move_to_end(key)
+    return paths
+
+def _search_cache_put(key: SearchCacheKey, paths: Tuple[str, ...]) -> None:
+    _search_cache[key] = (time.monotonic(), paths)
+    _search_cache.move_to_end(key)
+    while len(_search_cache) > SEARCH_CACHE_MAXSIZE:
+        _search_cache.popitem(last=False)
+
+def _pattern_error(pattern: str) -> Optional[str]:
+    """Return why the server would reject `pattern`, or None if it is acceptable."""
+    # Mirrors the server's check. fnmatch.translate escapes everything, so any glob compiles.
+    if ".." in pattern or pattern.startswith(("/", "\\")):
+        return "Invalid pattern."
+    return None
+
+class SearchServerError(Exception):
+    """The server answered the search with an error_message."""
+
+def _result_chunks(responses):
+    """Yield the path lists of a SearchFiles stream, raising on a server-reported error."""
+    for response in responses:
+        if response.error_message:
+            raise SearchServerError(response.error_message)
+        packed = response.found_files_packed
+        if packed:
+            # One decode and one split per chunk instead of a str per repeated field.
+            yield packed.decode("utf-8", "surrogatepass").split("\0")
+        else:
+            yield response.found_files  # Older servers only fill the repeated field.
+
+def call_grpc_server(file_pattern: str, base_key: Optional[str], hidden: bool, *, verbose: bool = True, exact: bool = False):
     search_desc = f"in '{base_key}'" if base_key else "in *all allowed paths*"
-    if verbose:
-        print(f"\n--- DEBUG (gRPC): Attempting to connect to gRPC server at 'localhost:50051' ---")
+    cache_key: SearchCacheKey = (file_pattern, base_key, hidden, exact)
+    # Per-call gRPC trace lines are only printed when debug logging is enabled.
+    debug = verbose and logger.isEnabledFor(logging.DEBUG)
+
+    # Reject patterns the server would refuse without paying for a round-trip.
+    pattern_error = _pattern_error(file_pattern)
+    if pattern_error:
+        if verbose:
+            print(f"❌ {pattern_error}")
+        return []
     
     try:
-        with grpc.insecure_channel('localhost:50051') as channel:
-            stub = filesearch_pb2_grpc.FileSearcherStub(channel)
-            
+        cached = _search_cache_get(cache_key)
+        if cached is not None:
+            if debug:
+                print("\n--- DEBUG (gRPC): Reusing cached results for this search (no RPC sent). ---")
+            chunks = iter([cached])
+        else:
+            if debug:
+                print(f"\n--- DEBUG (gRPC): Using pooled gRPC channel to '{GRPC_TARGET}' ---")
             request = filesearch_pb2.SearchRequest(  # type: ignore[attr-defined]
                 base_path_key=base_key, 
                 file_pattern=file_pattern,
-                include_hidden=hidden
+                include_hidden=hidden,
+                exact_basename=exact,
             )
             
-            if verbose:
-                print(f"--- DEBUG (gRPC): Connection successful. Sending request: {{pattern: '{file_pattern}', key: '{base_key}'}} ---")
-            response = stub.SearchFiles(request)
-            if verbose:
-                print("--- DEBUG (gRPC): Server responded. ---")
-            
-            if response.error_message:
-                if verbose:
-                    print(f"❌ Server Error: {response.error_message}")
-                return []
-            
-            if not response.found_files:
-                if verbose:
-                    print("\n✅ Server responded: No files found for that criteria.")
-                return []
+            if debug:
+                print(f"--- DEBUG (gRPC): Sending request: {{pattern: '{file_pattern}', key: '{base_key}'}} ---")
+            stub = get_channel_pool().next_stub()
+            chunks = _result_chunks(stub.SearchFiles(request, timeout=GRPC_TIMEOUT_S, wait_for_ready=False))
 
-            total = len(response.found_files)
+        found = []
+        show_n = 50
+        for paths in chunks:
+            # Print hits as chunks arrive; only the first show_n are displayed.
+            if verbose and len(found) < show_n and paths:
+                if not found:
+                    print(f"\n✅ Server results (showing first {show_n}):")
+                sys.stdout.write("".join(f"  - {f}\n" for f in itertools.islice(paths, show_n - len(found))))
+            found.extend(paths)
+        if cached is None:
+            _search_cache_put(cache_key, tuple(found))
+            if debug:
+                print("--- DEBUG (gRPC): Server finished streaming results. ---")
+        
+        if not found:
             if verbose:
-                show_n = min(total, 50)
-                print(f"\n✅ Server found {total} files (showing first {show_n}):")
-                for f in response.found_files[:show_n]:
-                    print(f"  - {f}")
-                if total > show_n:
-                    print(f"  ... and {total - show_n} more")
-            return list(response.found_files)
+                print("\n✅ Server responded: No files found for that criteria.")
+            return []
 
+        total = len(found)
+        if verbose:
+            if total > show_n:
+                print(f"  ... and {total - show_n} more")
+            print(f"✅ Server found {total} files.")
+        return found
+
+    except SearchServerError as e:
+        if verbose:
+            print(f"❌ Server Error: {e}")
+        return []
     except grpc.RpcError as e:
+        if e.code() == grpc.StatusCode.DEADLINE_EXCEEDED:
+            # Always reported, even for quiet lookups: an empty result here would read as
+            # "no such file". Returns None so callers can tell a timeout from no matches.
+            print(f"\n❌ Search timed out after {GRPC_TIMEOUT_S:g}s. Try a narrower pattern or base path key.")
+            return None
+        if e.code() == grpc.StatusCode.RESOURCE_EXHAUSTED:
+            # The server caps concurrent searches; it is up, just busy.
+            print("\n❌ The search server is busy with other searches. Please try again in a moment.")
+            return None
         if verbose:
             print(f"\n❌ gRPC connection FAILED: {e.details()}")
             print("   Is the `search_server.py` script running in its own terminal?")
@@ -113,22 +339,285 @@ def call_grpc_server(file_pattern: str, base_key: Optional[str], hidden: bool, *
             print(f"\n❌ An unexpected error occurred in gRPC call: {e}")
         return []
 
-# --- 3. The Main LLM Client Loop (Debug Enabled) ---
+# --- 2b. Streaming planner output ---
+def stream_json_plan(llm, messages) -> str:
+    """Stream the planner's tokens to stdout and stop as soon as the top-level JSON object closes."""
+    chunks = []
+    depth = 0
+    in_string = False
+    escaped = False
+    complete = False
+    for message_chunk in llm.stream(messages):
+        chunk = message_chunk.content
+        for i, ch in enumerate(chunk):
+            if in_string:
+                if escaped:
+                    escaped = False
+                elif ch == '\\':
+                    escaped = True
+                elif ch == '"':
+                    in_string = False
+            elif ch == '"':
+                in_string = True
+            elif ch == '{':
+                depth += 1
+            elif ch == '}' and depth > 0:
+                depth -= 1
+                if depth == 0:
+                    complete = True
+                    # Drop anything the model emitted after the closing brace.
+                    chunk = chunk[:i + 1]
+                    break
+        chunks.append(chunk)
+        sys.stdout.write(chunk)
+        sys.stdout.flush()
+        if complete:
+            break
+    sys.stdout.write("\n")
+    return "".join(chunks)
+
+# --- 2c. Lazily constructed LLM clients ---
+@functools.lru_cache(maxsize=None)
+def get_llms(ollama_base_url: str):
+    """Return (router_llm, answer_llm), importing LangChain/Ollama on first use.
+
+    The imports cost well over half a second, so exit-only and fast-path-only
+    sessions never pay for them.
+    """
+    from langchain_core.caches import InMemoryCache
+    from langchain_core.globals import set_llm_cache
+    from langchain_ollama import ChatOllama
+
+    if logger.isEnabledFor(logging.DEBUG):
+        print(f"--- DEBUG (LLM): Initializing Ollama clients for {ollama_base_url} ---")
+    # Identical prompts are answered from memory instead of another Ollama round-trip.
+    # Bounded like the plan cache so a long session doesn't keep every reply.
+    set_llm_cache(InMemoryCache(maxsize=PLAN_CACHE_MAXSIZE))
+    # Routing is a small classification task, so a 1B model plans every turn; the plan's
+    # JSON schema is passed as `format`, so Ollama constrains decoding to it.
+    router_llm = ChatOllama(base_url=ollama_base_url, model="llama3.2:1b", format=Plan.model_json_schema())
+    # The larger model is only used to write answers to conceptual questions.
+    answer_llm = ChatOllama(base_url=ollama_base_url, model="llama3.2:latest")
+    return router_llm, answer_llm
+
+# --- 3. Query routing and plan dispatch ---
+# 'show' memory-maps files larger than this and writes the raw bytes to stdout; smaller
+# files go through the text layer so undecodable bytes are replaced.
+SHOW_MMAP_THRESHOLD = 1_000_000
+
+def try_fast_path(query: str) -> bool:
+    """Run template queries like "find *.py in docs" directly; return True if the query was handled."""
+    fast = _FAST_SEARCH_RE.fullmatch(query.strip())
+    if not fast:
+        return False
+    if logger.isEnabledFor(logging.DEBUG):
+        print("--- DEBUG: Query matched the fast-path template; skipping the LLM. ---")
+    base_key = fast['key'].lower() if fast['key'] else None
+    pattern = fast['pat']
+    # The server skips dot-names unless include_hidden is set, so ".env" must ask for them.
+    call_grpc_server(file_pattern=pattern, base_key=base_key, hidden=pattern.startswith('.'))
+    return True
+
+def planning_messages(query: str):
+    # The output schema is enforced via `format`; the policy is the shared system message
+    return [("system", PLANNER_SYSTEM_PROMPT), ("human", query)]
+
+def parse_plan(ai_raw: str) -> Tuple[Plan, bool]:
+    """Return (plan, valid). Unparseable output falls back to an answer and is not valid."""
+    try:
+        return Plan.model_validate_json(ai_raw), True
+    except ValidationError:
+        return Plan(action="answer", answer=ai_raw), False
+
+def dispatch_plan(query: str, plan: Plan, answer_llm) -> None:
+    action = plan.action
+    if action == "answer":
+        if logger.isEnabledFor(logging.DEBUG):
+            print("--- DEBUG (LLM): Asking the answer model. ---")
+        answer = answer_llm.invoke([("system", ANSWER_SYSTEM_PROMPT), ("human", query)])
+        print("\n🤖 Assistant:")
+        print(f"   {answer.content or plan.answer or ''}")
+    elif action == "clarify":
+        print("\n🤖 Clarification needed:")
+        print(f"   {plan.clarify or 'Could you clarify your request?'}")
+    elif action == "show":
+        show_args = plan.show or FileShowArgs(file_name="")
+        file_name = show_args.file_name
+        base_key = show_args.base_path_key
+        include_hidden = show_args.include_hidden
+
+        # Validate filename: must be a simple filename, no paths or wildcards
+        if not _is_simple_filename(file_name):
+            # Fallback: try to extract a plausible filename from the user's query
+            candidate = None
+            # 1) Prefer quoted segments
+            quoted = _QUOTED_RE.findall(query)
+            for q in quoted:
+                if _is_simple_filename(q):
+                    candidate = q
+                    break
+            # 2) Check whitespace tokens for something that looks like a filename with an extension
+            if candidate is None:
+                for tok in query.split():
+                    if '.' in tok and _is_simple_filename(tok):
+                        candidate = tok
+                        break
+            if candidate is None:
+                print("\n🤖 Missing or invalid file_name for show action.")
+                return
+            file_name = candidate
+        if not _BAD_FILENAME_CHARS.isdisjoint(file_name):
+            print("\n🤖 'show' requires an exact filename (no paths or wildcards). Try action 'search' instead.")
+            return
+
+        # Search for candidate files without verbose printing. exact=True lets the server
+        # compare names literally instead of running them through its glob matcher.
+        candidates = call_grpc_server(
+            file_pattern=file_name,
+            base_key=base_key,
+            hidden=include_hidden,
+            verbose=False,
+            exact=True,
+        )
+        if candidates is None:
+            return  # Timed out or server busy; call_grpc_server already reported it.
+
+        # Filter for exact filename matches (case-insensitive)
+        fname_lower = file_name.lower()
+        exact = [p for p in candidates if os.path.basename(p).lower() == fname_lower]
+
+        if not exact:
+            print("\n🤖 No file found matching that exact name.")
+            if candidates:
+                # Show hints: top few similar paths
+                preview = candidates[:10]
+                print("   Did you mean one of these?")
+                for p in preview:
+                    print(f"   - {p}")
+            return
+        if len(exact) > 1:
+            print("\n🤖 Multiple files matched that name; please be more specific using a base path key or different name:")
+            for p in exact[:20]:
+                print(f"   - {p}")
+            if len(exact) > 20:
+                print(f"   ... and {len(exact)-20} more")
+            return
+
+        # Exactly one match: read and display full content
+        target = exact[0]
+        try:
+            # Informative header
+            print(f"\n📄 Showing full content of: {target}")
+            size_bytes = None
+            try:
+                size_bytes = os.path.getsize(target)
+                print(f"   Size: {size_bytes} bytes")
+            except Exception:
+                pass
+            out = getattr(sys.stdout, "buffer", None)
+            if size_bytes is not None and size_bytes > SHOW_MMAP_THRESHOLD and out is not None:
+                # Large file: let the kernel page it in and hand the mapping straight to
+                # stdout, skipping the UTF-8 decode and the copy into a str.
+                with open(target, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    print("\n--- BEGIN FILE ---", flush=True)
+                    out.write(mm)
+                    out.write(b"\n")
+                    out.flush()
+                print("--- END FILE ---\n")
+                return
+            with open(target, 'r', encoding='utf-8', errors='replace', buffering=65536) as f:
+                print("\n--- BEGIN FILE ---")
+                # Stream in 64 KiB chunks: memory stays flat and output starts before the
+                # whole file has been read.
+                shutil.copyfileobj(f, sys.stdout, 65536)
+                print()
+            print("--- END FILE ---\n")
+        except Exception as e:
+            print(f"\n❌ Failed to read file: {e}")
+    elif action == "search":
+        search_args = plan.search
+        if search_args is None or not search_args.file_pattern:
+            print("\n🤖 Missing or invalid file_pattern. Please provide a glob or filename.")
+            return
+
+        call_grpc_server(
+            file_pattern=search_args.file_pattern,
+            base_key=search_args.base_path_key,
+            hidden=search_args.include_hidden,
+        )
+
+def run_batch(queries, ollama_base_url: str, max_concurrency: int = 8) -> None:
+    """Plan every non-template query in one concurrent batch, then dispatch them in order."""
+    plans: Dict[str, Plan] = {}
+    to_plan: Dict[str, str] = {}
+    for q in queries:
+        key = _normalize_query(q)
+        if _FAST_SEARCH_RE.fullmatch(q) or key in to_plan:
+            continue
+        cached = _plan_cache_get(key)
+        if cached is not None:
+            plans[key] = cached
+        else:
+            to_plan[key] = q
+    # Planning failures are kept per query so one bad call doesn't drop the whole batch.
+    errors: Dict[str, Exception] = {}
+    if to_plan:
+        try:
+            router_llm, _ = get_llms(ollama_base_url)
+            if logger.isEnabledFor(logging.DEBUG):
+                print(f"--- DEBUG (LLM): Planning {len(to_plan)} queries in one batch (max_concurrency={max_concurrency}) ---")
+            replies = router_llm.batch(
+                [planning_messages(q) for q in to_plan.values()],
+                config={"max_concurrency": max_concurrency},
+                return_exceptions=True,
+            )
+        except Exception as e:
+            replies = [e] * len(to_plan)
+        for key, reply in zip(to_plan, replies):
+            if isinstance(reply, Exception):
+                errors[key] = reply
+                continue
+            plans[key], valid = parse_plan(reply.content)
+            if valid:  # Don't pin a malformed reply for the rest of the session.
+                _plan_cache_put(key, plans[key])
+
+    for query in queries:
+        print(f"\n> {query}")
+        try:
+            if not try_fast_path(query):
+                key = _normalize_query(query)
+                if key in errors:
+                    print(f"\n❌ Planning failed for this query: {errors[key]}")
+                    continue
+                _, answer_llm = get_llms(ollama_base_url)
+                dispatch_plan(query, plans[key], answer_llm)
+        except Exception as e:
+            print(f"\n❌ An error occurred while handling this query: {e}")
+
+# --- 4. The Main LLM Client Loop (Debug Enabled) ---
 def main():
     print("--- DEBUG: Initializing Client ---")
+    get_channel_pool().connect()
     
     # --- THIS IS THE FIX ---
     ollama_base_url = "http://170.70.1.53:11434"
     # -----------------------
 
-    try:
-        print(f"--- DEBUG (LLM): Attempting to connect to Ollama Server at {ollama_base_url} ---")
-        llm = OllamaLLM(base_url=ollama_base_url, model="llama3.2:latest", format="json")
-        print("--- DEBUG (LLM): Ollama connection appears successful. ---")
-    except Exception as e:
-        print(f"\n❌ CRITICAL FAILURE: Could not initialize Ollama.")
-        print(f"   Error: {e}")
-        print(f"   Check that {ollama_base_url} is correct AND includes 'http://'")
+    # Piped input (e.g. `client.py < queries.txt`): plan all queries in one batch.
+    if not sys.stdin.isatty():
+        queries = []
+        for line in sys.stdin:
+            line = line.strip()
+            if line.lower() in ['exit', 'quit']:
+                break
+            if line:
+                queries.append(line)
+        try:
+            run_batch(queries, ollama_base_url)
+        except Exception as e:
+            print(f"\n❌ An error occurred in batch mode: {e}")
+            print("   This may be a network error connecting to OLLAMA.")
+            print(f"   Check your connection to {ollama_base_url}")
         return
 
     print("🤖 LLM File Search Client is ready.")
@@ -139,192 +628,27 @@ def main():
             query = input("\n> ")
             if query.lower() in ['exit', 'quit']:
                 break
+
+            if try_fast_path(query):
+                continue
                 
+            router_llm, answer_llm = get_llms(ollama_base_url)
             print(f"--- DEBUG (LLM): Sending query to LLM: '{query}' ---")
             sys.stdout.flush() # Force print to show up
-            
-            # Build a single-turn prompt instructing JSON planning for actions
-            allowed_keys = ["docs", "downloads", "desktop", "pictures", "videos", "music"]
-            planning_instructions = f"""
-{SYSTEM_POLICY}
-
-You must decide one action: "search", "show", "answer", or "clarify".
-- action="search": Use when the user wants to find files/folders. Provide search inputs.
-- action="show": Use only when the user provided the exact name of a single file (no wildcards, no paths). You must return the file_name and optionally base_path_key/include_hidden so the client can search for that exact file and display its full content.
-- action="answer": Use when the user asks a conceptual/explanatory question; provide a textual answer.
-- action="clarify": Use when the user likely wants a search but didn't provide enough info; ask exactly one short clarifying question.
-
-Output STRICT JSON only (no prose), following this schema:
-{{
-    "action": "search" | "show" | "answer" | "clarify",
-    "search": {{
-        "file_pattern": "string",
-        "base_path_key": "one of {allowed_keys} or null",
-        "include_hidden": true | false
-    }},
-    "show": {{
-        "file_name": "string",  // exact filename only, e.g., "README.md"; no wildcards/paths
-        "base_path_key": "one of {allowed_keys} or null",
-        "include_hidden": true | false
-    }},
-    "answer": "string",
-    "clarify": "string"
-}}
-
-Fill only the relevant field(s) matching the action. Return JSON only.
-
-User Query: {query}
-"""
-
-            ai_raw = llm.invoke(planning_instructions)
-            print("--- DEBUG (LLM): Raw JSON plan received. ---")
-
-            # Parse JSON robustly
-            plan: Dict[str, Any]
-            try:
-                plan = json.loads(ai_raw)
-            except Exception:
-                # Try to extract JSON object if any extra tokens slipped in
-                start = ai_raw.find('{')
-                end = ai_raw.rfind('}')
-                if start != -1 and end != -1 and end > start:
-                    try:
-                        plan = json.loads(ai_raw[start:end+1])
-                    except Exception:
-                        plan = {"action": "answer", "answer": ai_raw}
-                else:
-                    plan = {"action": "answer", "answer": ai_raw}
-
-            action = (plan.get("action") or "").lower()
-            if action == "answer":
-                print("\n🤖 Assistant:")
-                print(f"   {plan.get('answer') or ''}")
-                continue
-            elif action == "clarify":
-                print("\n🤖 Clarification needed:")
-                print(f"   {plan.get('clarify') or 'Could you clarify your request?'}")
-                continue
-            elif action == "show":
-                show_args = plan.get("show") or {}
-                file_name = (
-                    show_args.get("file_name")
-                    or show_args.get("filename")
-                    or show_args.get("name")
-                    or show_args.get("file")
-                )
-                base_key = show_args.get("base_path_key")
-                include_hidden = bool(show_args.get("include_hidden", False))
-
-                # Validate filename: must be a simple filename, no paths or wildcards
-                def _is_simple_filename(name: str) -> bool:
-                    if not name or not isinstance(name, str):
-                        return False
-                    if any(sep in name for sep in ['\\', '/', ':']):
-                        return False
-                    if any(ch in name for ch in ['*', '?', '[', ']']):
-                        return False
-                    return True
-
-                if not _is_simple_filename(file_name if isinstance(file_name, str) else ""):
-                    # Fallback: try to extract a plausible filename from the user's query
-                    candidate = None
-                    # 1) Prefer quoted segments
-                    quoted = re.findall(r'["\']([^"\']{1,255})["\']', query)
-                    for q in quoted:
-                        if _is_simple_filename(q):
-                            candidate = q
-                            break
-                    # 2) Check whitespace tokens for something that looks like a filename with an extension
-                    if candidate is None:
-                        for tok in query.split():
-                            if '.' in tok and _is_simple_filename(tok):
-                                candidate = tok
-                                break
-                    if candidate is None:
-                        print("\n🤖 Missing or invalid file_name for show action.")
-                        continue
-                    file_name = candidate
-                # At this point we have a validated simple filename; enforce type for linters
-                file_name = str(file_name)
-                if any(sep in file_name for sep in ['\\', '/', ':']) or any(ch in file_name for ch in ['*', '?', '[', ']']):
-                    print("\n🤖 'show' requires an exact filename (no paths or wildcards). Try action 'search' instead.")
-                    continue
-                if base_key is not None and base_key not in allowed_keys:
-                    print("\n🤖 Invalid base_path_key for show. Allowed: docs/downloads/desktop/pictures/videos/music.")
-                    continue
 
-                # Search for candidate files without verbose printing
-                candidates = call_grpc_server(
-                    file_pattern=file_name,
-                    base_key=base_key,
-                    hidden=include_hidden,
-                    verbose=False,
-                )
-
-                # Filter for exact filename matches (case-insensitive)
-                fname_lower = file_name.lower()
-                exact = [p for p in candidates if os.path.basename(p).lower() == fname_lower]
-
-                if not exact:
-                    print("\n🤖 No file found matching that exact name.")
-                    if candidates:
-                        # Show hints: top few similar paths
-                        preview = candidates[:10]
-                        print("   Did you mean one of these?")
-                        for p in preview:
-                            print(f"   - {p}")
-                    continue
-                if len(exact) > 1:
-                    print("\n🤖 Multiple files matched that name; please be more specific using a base path key or different name:")
-                    for p in exact[:20]:
-                        print(f"   - {p}")
-                    if len(exact) > 20:
-                        print(f"   ... and {len(exact)-20} more")
-                    continue
+            plan_key = _normalize_query(query)
+            plan = _plan_cache_get(plan_key)
+            if plan is None:
+                print("--- DEBUG (LLM): Streaming JSON plan: ---")
+                ai_raw = stream_json_plan(router_llm, planning_messages(query))
+                print("--- DEBUG (LLM): Raw JSON plan received. ---")
+                plan, valid = parse_plan(ai_raw)
+                if valid:  # A malformed or cut-off plan is retried next time, not cached.
+                    _plan_cache_put(plan_key, plan)
+            elif logger.isEnabledFor(logging.DEBUG):
+                print("--- DEBUG (LLM): Reusing cached plan. ---")
 
-                # Exactly one match: read and display full content
-                target = exact[0]
-                try:
-                    # Informative header
-                    print(f"\n📄 Showing full content of: {target}")
-                    size_bytes = None
-                    try:
-                        size_bytes = os.path.getsize(target)
-                        print(f"   Size: {size_bytes} bytes")
-                    except Exception:
-                        pass
-                    with open(target, 'r', encoding='utf-8', errors='replace') as f:
-                        content = f.read()
-                    print("\n--- BEGIN FILE ---")
-                    print(content)
-                    print("--- END FILE ---\n")
-                except Exception as e:
-                    print(f"\n❌ Failed to read file: {e}")
-                continue
-            elif action == "search":
-                search_args = plan.get("search") or {}
-                file_pattern = search_args.get("file_pattern")
-                base_key = search_args.get("base_path_key")
-                include_hidden = bool(search_args.get("include_hidden", False))
-
-                # Validate base_key
-                if base_key is not None and base_key not in allowed_keys:
-                    print("\n🤖 Invalid base_path_key returned by model. Allowed: docs/downloads/desktop/pictures/videos/music.")
-                    continue
-                if not file_pattern or not isinstance(file_pattern, str):
-                    print("\n🤖 Missing or invalid file_pattern. Please provide a glob or filename.")
-                    continue
-
-                call_grpc_server(
-                    file_pattern=file_pattern,
-                    base_key=base_key,
-                    hidden=include_hidden,
-                )
-                continue
-            else:
-                print("\n🤖 Unexpected planner action. Raw response:")
-                print(f"   {ai_raw}")
-                continue
+            dispatch_plan(query, plan, answer_llm)
 
         except Exception as e:
             print(f"\n❌ An error occurred in the client loop: {e}")
@@ -332,4 +656,8 @@ User Query: {query}
             print(f"   Check your connection to {ollama_base_url}")
 
 if __name__ == '__main__':
+    if os.environ.get("MCP_CLIENT_DEBUG"):
+        # Only this module's logger: library loggers (grpc, httpx, ...) stay quiet.
+        logging.basicConfig()
+        logger.setLevel(logging.DEBUG)
     main()
\ No newline at end of file
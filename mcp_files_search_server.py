@@ -1,11 +1,21 @@
 import os
+# Use the native (upb) protobuf backend rather than the pure-Python one. This must be set
+# before google.protobuf is first imported.
+os.environ.setdefault("PROTOCOL_BUFFERS_PYTHON_IMPLEMENTATION", "upb")
 import fnmatch
+import re
 from concurrent import futures
 import time
 import logging
+import logging.handlers
+import queue
+import threading
 import grpc
 import filesearch_pb2
 import filesearch_pb2_grpc
+from google.protobuf.internal import api_implementation
+if api_implementation.Type() == "python":
+    print("WARNING: pure-Python protobuf backend in use; install protobuf>=4.21 for the native upb backend.")
 try:
     from win32com.shell import shell, shellcon
 except ImportError:
@@ -31,76 +41,290 @@ ALLOWED_PATHS = {
 }
 ALLOWED_PATHS = {k: v for k, v in ALLOWED_PATHS.items() if v and os.path.isdir(v)}
 
+# Matches are streamed back in SearchResponse chunks of at most this many paths.
+RESULT_CHUNK_SIZE = 256
+
+# How long global-search walkers and the streaming thread block on the bounded result
+# queue before re-checking whether the call was cancelled.
+QUEUE_POLL_S = 0.5
+
+# fnmatch metacharacters; a pattern without any of them can only match its own name.
+GLOB_META_CHARS = frozenset('*?[')
+
+# Accept the client's idle keepalive pings (every 30s). The default policy allows one idle
+# ping per 2h and answers more with GOAWAY "too_many_pings", dropping the connection.
+GRPC_SERVER_OPTIONS = [
+    ('grpc.keepalive_permit_without_calls', 1),
+    ('grpc.http2.min_ping_interval_without_data_ms', 20000),
+]
+
+# RPC handler threads. Calls beyond this are rejected with RESOURCE_EXHAUSTED instead of
+# queueing silently behind long global searches.
+SERVER_MAX_WORKERS = 10
+
+# Directory listings keyed by path and validated against the directory's mtime, so repeat
+# searches over unchanged folders cost one stat() per directory instead of a scandir.
+# Bounded by the total number of cached entries (each directory also counts as one). Once
+# full, new directories are simply not admitted: every walk visits directories in the same
+# order, so LRU eviction would make a tree larger than the cap evict exactly what the next
+# walk needs first. Directories that vanish are dropped so they don't hold the budget.
+DIR_CACHE_MAX_ENTRIES = 500_000
+_dir_cache = {}  # path -> (st_mtime_ns, [(name, full_path, is_dir), ...])
+_dir_cache_entries = 0
+_dir_cache_lock = threading.Lock()
+
+def _drop_cached_tree(path):
+    """Remove `path` and every cached directory below it. Caller holds _dir_cache_lock."""
+    global _dir_cache_entries
+    stack = [path]
+    while stack:
+        cached = _dir_cache.pop(stack.pop(), None)
+        if cached is not None:
+            _dir_cache_entries -= len(cached[1]) + 1
+            stack.extend(p for _, p, is_dir in cached[1] if is_dir)
+
+def _list_dir(path):
+    """Return [(name, full_path, is_dir)] for `path`, reusing the cached listing while its mtime is unchanged."""
+    global _dir_cache_entries
+    try:
+        # stat before scandir: if the directory changes in between, the next stat won't match.
+        mtime_ns = os.stat(path).st_mtime_ns
+        # Lock-free read: dict.get is atomic and entries are immutable tuples, only writes lock.
+        cached = _dir_cache.get(path)
+        if cached is not None and cached[0] == mtime_ns:
+            return cached[1]
+
+        listing = []
+        append = listing.append
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    is_dir = entry.is_dir(follow_symlinks=False)
+                except OSError:
+                    is_dir = False
+                append((entry.name, entry.path, is_dir))
+    except OSError:
+        # Gone or unreadable: forget it (and anything cached below it).
+        with _dir_cache_lock:
+            _drop_cached_tree(path)
+        raise
+
+    with _dir_cache_lock:
+        old = _dir_cache.pop(path, None)
+        if old is not None:
+            _dir_cache_entries -= len(old[1]) + 1
+            # Subdirectories that were removed or renamed won't be walked again; drop them.
+            still_listed = {p for _, p, is_dir in listing if is_dir}
+            for _, p, is_dir in old[1]:
+                if is_dir and p not in still_listed:
+                    _drop_cached_tree(p)
+        if _dir_cache_entries + len(listing) + 1 <= DIR_CACHE_MAX_ENTRIES:
+            _dir_cache[path] = (mtime_ns, listing)
+            _dir_cache_entries += len(listing) + 1
+    return listing
+
 class FileSearcherServicer(filesearch_pb2_grpc.FileSearcherServicer):
 
-    def _perform_search(self, root_dir, pattern, include_hidden):
-        found = []
-        pattern_lower = pattern.lower()
+    def __init__(self):
+        # Walkers for global searches, one per allowed root per concurrent RPC, so one
+        # client's global search never waits for another's. Kept separate from the gRPC
+        # server's executor so long walks never starve RPC handler threads. Threads are
+        # enough here: the walk is mostly scandir/stat syscalls, which release the GIL.
+        # Name matching does hold it (a compiled regex, or a str comparison for literals).
+        self._search_pool = futures.ThreadPoolExecutor(
+            max_workers=max(1, len(ALLOWED_PATHS)) * SERVER_MAX_WORKERS,
+            thread_name_prefix="search",
+        )
+
+    @staticmethod
+    def _compile_pattern(pattern, exact=False):
+        """Compile a glob once per request into a case-insensitive `match` callable.
+
+        With `exact`, or when the pattern has no wildcards, it is a literal file name and
+        is compared directly instead of running through the regex engine.
+        """
+        if exact or GLOB_META_CHARS.isdisjoint(pattern):
+            target = pattern.lower()
+            return lambda name: name.lower() == target
+        return re.compile(fnmatch.translate(pattern), re.IGNORECASE).match
+
+    def _perform_search(self, root_dir, match, include_hidden, cancelled=None):
+        """Yield matching paths under root_dir as the walk discovers them.
+
+        Files and directories are tested against `match` once, in the same pass. A
+        matching directory is reported and still descended into, so matches inside it
+        are found too; is_dir() only decides recursion, never whether an entry matches.
+        """
         try:
-            for root, dirs, files in os.walk(root_dir, topdown=True):
-                if not include_hidden:
-                    dirs[:] = [d for d in dirs if not d.startswith('.')]
-                    files = [f for f in files if not f.startswith('.')]
-                for filename in files:
-                    if fnmatch.fnmatch(filename.lower(), pattern_lower):
-                        full_path = os.path.join(root, filename)
-                        found.append(full_path)
-                for dirname in dirs:
-                    if fnmatch.fnmatch(dirname.lower(), pattern_lower):
-                        full_path = os.path.join(root, dirname)
-                        found.append(full_path)
+            # Iterative DFS over (cached) os.scandir listings: each entry carries its full
+            # path and file type, so there is no os.path.join or extra stat() per entry.
+            # Hot loop: bind methods and flags to locals to skip per-entry attribute lookups.
+            skip_hidden = not include_hidden
+            list_dir = _list_dir
+            stack = [root_dir]
+            push = stack.append
+            pop = stack.pop
+            while stack:
+                if cancelled is not None and cancelled.is_set():
+                    return
+                current = pop()
+                try:
+                    listing = list_dir(current)
+                except OSError:
+                    # Unreadable directory (permissions, vanished); skip it like os.walk does.
+                    continue
+                for name, path, is_dir in listing:
+                    if skip_hidden and name[0] == '.':
+                        continue
+                    if match(name):
+                        yield path
+                    # Like os.walk, list symlinked dirs but don't descend into them.
+                    if is_dir:
+                        push(path)
         except Exception as e:
             logging.warning(f"Error searching {root_dir}: {e}")
-            pass 
-        return found
+
+    @staticmethod
+    def _chunked(paths):
+        """Group a stream of paths into lists of at most RESULT_CHUNK_SIZE."""
+        batch = []
+        append = batch.append
+        for path in paths:
+            append(path)
+            if len(batch) >= RESULT_CHUNK_SIZE:
+                yield batch
+                batch = []
+                append = batch.append
+        if batch:
+            yield batch
+
+    @staticmethod
+    def _pack_paths(batch):
+        """Encode a chunk of paths as NUL-separated UTF-8 for SearchResponse.found_files_packed."""
+        # surrogatepass round-trips unpaired surrogates that Windows allows in file names.
+        return "\0".join(batch).encode("utf-8", "surrogatepass")
+
+    @staticmethod
+    def _put_unless_cancelled(results, item, cancelled):
+        """Block until `item` fits on the bounded queue; give up (False) once cancelled."""
+        while True:
+            try:
+                results.put(item, timeout=QUEUE_POLL_S)
+                return True
+            except queue.Full:
+                if cancelled.is_set():
+                    return False
+
+    def _search_root_into(self, root_dir, match, include_hidden, results, cancelled):
+        """Worker body for global searches: push result chunks onto `results`, then None."""
+        try:
+            for batch in self._chunked(self._perform_search(root_dir, match, include_hidden, cancelled)):
+                if not self._put_unless_cancelled(results, batch, cancelled):
+                    return
+        finally:
+            self._put_unless_cancelled(results, None, cancelled)
 
     def SearchFiles(self, request, context):
-        print("\n--- DEBUG (gRPC): Server received a new request. ---")
-        
         pattern = request.file_pattern
         include_hidden = request.include_hidden
+        exact = request.exact_basename
         base_path_key = None
         if request.HasField('base_path_key'):
             base_path_key = request.base_path_key.lower()
 
-        print(f"--- DEBUG (gRPC): Request details: {{pattern: '{pattern}', key: '{base_path_key}', hidden: {include_hidden}}} ---")
+        logging.debug("Request: pattern=%r key=%r hidden=%s exact=%s", pattern, base_path_key, include_hidden, exact)
 
-        response = filesearch_pb2.SearchResponse()
-        all_found_files = []
-        
         if ".." in pattern or pattern.startswith(("/", "\\")):
             logging.warning(f"Client sent potentially malicious pattern: {pattern}")
-            response.error_message = "Invalid pattern."
-            print("--- DEBUG (gRPC): Rejected malicious pattern. Sending error response. ---")
-            return response
+            yield filesearch_pb2.SearchResponse(error_message="Invalid pattern.")
+            return
 
+        match = self._compile_pattern(pattern, exact)
+        total_found = 0
         if base_path_key:
             if base_path_key not in ALLOWED_PATHS:
                 logging.warning(f"Client requested invalid base path key: {request.base_path_key}")
-                response.error_message = f"Invalid base path key. Allowed keys are: {list(ALLOWED_PATHS.keys())}"
-                print(f"--- DEBUG (gRPC): Invalid key '{base_path_key}'. Sending error response. ---")
-                return response
+                yield filesearch_pb2.SearchResponse(
+                    error_message=f"Invalid base path key. Allowed keys are: {list(ALLOWED_PATHS.keys())}"
+                )
+                return
             
             root_dir_to_search = ALLOWED_PATHS[base_path_key]
-            logging.info(f"Starting specific search in '{root_dir_to_search}' for pattern '{pattern}'")
-            all_found_files = self._perform_search(root_dir_to_search, pattern, include_hidden)
+            logging.debug("Starting specific search in %r for pattern %r", root_dir_to_search, pattern)
+            for batch in self._chunked(self._perform_search(root_dir_to_search, match, include_hidden)):
+                total_found += len(batch)
+                yield filesearch_pb2.SearchResponse(found_files_packed=self._pack_paths(batch))
             
         else:
-            logging.info(f"Starting global search for pattern '{pattern}' in all {len(ALLOWED_PATHS)} allowed paths.")
+            logging.debug("Starting global search for pattern %r in all %d allowed paths.", pattern, len(ALLOWED_PATHS))
+            # Walk all roots in parallel (scandir releases the GIL in its syscalls); workers
+            # hand chunks over a queue so each one is streamed as soon as it fills. The queue
+            # is bounded, so walkers pause while the client (HTTP/2 flow control) lags behind
+            # instead of buffering the whole result set here.
+            results = queue.Queue(maxsize=max(1, len(ALLOWED_PATHS)) * 2)
+            cancelled = threading.Event()
+            context.add_callback(cancelled.set)
             for key, root_dir in ALLOWED_PATHS.items():
-                logging.info(f"  ... searching in '{key}' ({root_dir})")
-                try:
-                    found_in_path = self._perform_search(root_dir, pattern, include_hidden)
-                    all_found_files.extend(found_in_path)
-                except Exception as e:
-                    logging.warning(f"Failed to search {key}: {e}")
+                logging.debug("  ... searching in %r (%s)", key, root_dir)
+                self._search_pool.submit(
+                    self._search_root_into, root_dir, match, include_hidden, results, cancelled
+                )
+            try:
+                remaining = len(ALLOWED_PATHS)
+                while remaining:
+                    try:
+                        batch = results.get(timeout=QUEUE_POLL_S)
+                    except queue.Empty:
+                        # Walkers stop without sending None once the call is cancelled.
+                        if cancelled.is_set():
+                            break
+                        continue
+                    if batch is None:
+                        remaining -= 1
+                        continue
+                    total_found += len(batch)
+                    yield filesearch_pb2.SearchResponse(found_files_packed=self._pack_paths(batch))
+            finally:
+                # Stops the remaining walkers if the client went away mid-stream.
+                cancelled.set()
 
-        response.found_files.extend(all_found_files)
-        print(f"--- DEBUG (gRPC): Search complete. Found {len(all_found_files)} files. Sending response. ---")
-        return response
+        logging.debug("Search complete. Streamed %d files.", total_found)
+
+class _InProcessQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that enqueues records untouched.
+
+    The stock prepare() formats the message (and any traceback) on the emitting thread so
+    records can be pickled; this queue never leaves the process, so that work is left to
+    the listener thread.
+    """
+
+    def prepare(self, record):
+        return record
+
+def _start_log_listener():
+    """Move the root logger's handlers behind a queue drained by a background thread.
+
+    RPC threads then only enqueue records; formatting and console I/O happen on the
+    listener thread, so a slow terminal never blocks a search. Returns the listener.
+    """
+    root = logging.getLogger()
+    handlers = root.handlers[:]
+    for handler in handlers:
+        root.removeHandler(handler)
+    log_queue = queue.SimpleQueue()
+    root.addHandler(_InProcessQueueHandler(log_queue))
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    return listener
 
 def serve():
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
+    # Gzip the streamed file lists; long shared path prefixes compress well.
+    server = grpc.server(
+        futures.ThreadPoolExecutor(max_workers=SERVER_MAX_WORKERS),
+        maximum_concurrent_rpcs=SERVER_MAX_WORKERS,
+        compression=grpc.Compression.Gzip,
+        options=GRPC_SERVER_OPTIONS,
+    )
     filesearch_pb2_grpc.add_FileSearcherServicer_to_server(
         FileSearcherServicer(), server
     )
@@ -122,4 +346,8 @@ def serve():
 
 if __name__ == '__main__':
     logging.basicConfig(level=logging.INFO)
-    serve()
\ No newline at end of file
+    log_listener = _start_log_listener()
+    try:
+        serve()
+    finally:
+        log_listener.stop()  # Flush queued records before exiting.
\ No newline at end of file